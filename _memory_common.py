@@ -0,0 +1,116 @@
+"""
+Helpers shared by the memory import, search, and export scripts.
+
+Keep this file next to the scripts; they import it from their own directory.
+"""
+
+import json
+import mmap
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+try:
+    import orjson  # optional: much faster JSONL parsing on large session dumps
+except ImportError:
+    orjson = None
+
+
+def get_db_path() -> Path:
+    """Get the memory database path, matching @whenmoon-afk/memory-mcp conventions."""
+    if os.environ.get("MEMORY_DB_PATH"):
+        return Path(os.environ["MEMORY_DB_PATH"])
+    if sys.platform == "win32":
+        return Path(os.environ.get("APPDATA", "")) / "claude-memories" / "memory.db"
+    elif sys.platform == "darwin":
+        return Path.home() / ".claude-memories" / "memory.db"
+    else:
+        return Path.home() / ".local" / "share" / "claude-memories" / "memory.db"
+
+
+DB_PATH = get_db_path()
+
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> str:
+        # Match orjson's compact output so metadata looks the same either way
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def iter_jsonl(path: Path):
+    """Yield each JSON object in a JSONL file, skipping blank and malformed lines.
+
+    Lines that parse to something other than an object (e.g. ``[1, 2]``) are
+    skipped too, since every caller treats records as dicts.
+
+    The file is memory-mapped and split on raw newlines, so lines go to the
+    parser as bytes without a text-mode decode/strip copy.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be mapped
+            return
+        with data:
+            pos, size = 0, len(data)
+            while pos < size:
+                end = data.find(b"\n", pos)
+                if end == -1:
+                    end = size
+                line = data[pos:end]
+                pos = end + 1
+                if not line or line.isspace():
+                    continue
+                try:
+                    obj = json_loads(line)
+                except ValueError:  # bad JSON or invalid UTF-8
+                    continue
+                if isinstance(obj, dict):
+                    yield obj
+
+
+# Precompiled patterns for the generate_summary helpers
+RE_HEADING = re.compile(r'^#+\s+', re.MULTILINE)
+RE_HEADING_TEXT = re.compile(r'^#+\s+(.+)$', re.MULTILINE)
+RE_BOLD = re.compile(r'\*\*([^*]+)\*\*')
+RE_FIRST_SENT = re.compile(r'^[^.!?\n]+[.!?]')
+
+
+INSERT_MEMORY_SQL = (
+    "INSERT INTO memories (id, content, type, importance, created_at, "
+    "last_accessed, is_deleted, summary, access_count, metadata) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_FTS_SQL = "INSERT INTO memories_fts (memory_id, content, summary) VALUES (?, ?, ?)"
+
+BATCH_SIZE = 5000  # rows per insert batch (and per commit in import_all_sessions)
+
+
+def tune_connection(conn: sqlite3.Connection, fast: bool = False):
+    """Favor bulk-write throughput: WAL journal, bigger caches, in-memory temp tables.
+
+    synchronous=NORMAL matches what the MCP server itself runs with. ``fast``
+    (the --fast flag) turns syncing off entirely, so a crash or power loss
+    mid-import can corrupt the database; only use it for one-off bulk loads.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={'OFF' if fast else 'NORMAL'}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB memory-mapped I/O
+
+
+def has_fts_trigger(conn: sqlite3.Connection) -> bool:
+    """Check whether the MCP schema's trigger already copies new memories into memories_fts."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'memories_fts_insert'"
+    ).fetchone() is not None
@@ -7,98 +7,103 @@ Usage:
     python export_chat.py conversation.jsonl chat_export.md
 """
 
-import json
+import io
 import sys
 from pathlib import Path
 from datetime import datetime
 
+from _memory_common import iter_jsonl
+
+# Non-conversation JSONL record types
+_SKIP_TYPES = frozenset({"queue-operation", "file-history-snapshot", "summary"})
+
+
+def _format_bash(inp: dict) -> str:
+    """Format a Bash tool call, truncating long commands."""
+    cmd = inp.get("command", "?")
+    if len(cmd) > 100:
+        cmd = cmd[:100] + "..."
+    return f"*[Bash: `{cmd}`]*"
+
+
+# Markdown annotations for tool_use blocks; other tools render as "*[Tool: Name]*"
+_TOOL_FORMATTERS = {
+    "Read": lambda inp: f"*[Read: {inp.get('file_path', '?')}]*",
+    "Write": lambda inp: f"*[Write: {inp.get('file_path', '?')}]*",
+    "Edit": lambda inp: f"*[Edit: {inp.get('file_path', '?')}]*",
+    "Bash": _format_bash,
+    "WebSearch": lambda inp: f"*[Search: {inp.get('query', '?')}]*",
+    "WebFetch": lambda inp: f"*[Fetch: {inp.get('url', '?')}]*",
+}
+
 
 def export_chat(input_path: Path, output_path: Path):
-    messages = []
-    with open(input_path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+    messages = list(iter_jsonl(input_path))
+
+    # Stream straight to disk so huge sessions aren't held in memory a second time
+    with open(output_path, "w", encoding="utf-8", buffering=1024 * 1024) as out:
+        out.write("# Claude Code Chat Export\n")
+        out.write(f"**Exported:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
+        out.write(f"**Source:** `{input_path.name}`\n")
+        out.write(f"**Messages:** {len(messages)}\n")
+        out.write("\n---\n")
+
+        for msg in messages:
+            role = msg.get("type")
+            if role is None:
+                role = msg.get("role", "unknown")
+
+            # Skip non-conversation types
+            if role in _SKIP_TYPES:
                 continue
-            try:
-                messages.append(json.loads(line))
-            except json.JSONDecodeError:
+
+            content = msg.get("message")
+            if content is None:
+                content = msg.get("content", "")
+
+            # Drill into nested message objects
+            if isinstance(content, dict):
+                content = content.get("content", "")
+
+            # Handle content that's a list (tool calls, etc.)
+            if isinstance(content, list):
+                # Non-empty parts go straight into one buffer, blank-line separated
+                parts = io.StringIO()
+                for block in content:
+                    part = ""
+                    if isinstance(block, dict):
+                        if block.get("type") == "text":
+                            part = block.get("text", "")
+                        elif block.get("type") == "tool_use":
+                            tool = block.get("name", "unknown")
+                            fmt = _TOOL_FORMATTERS.get(tool)
+                            part = fmt(block.get("input", {})) if fmt else f"*[Tool: {tool}]*"
+                        elif block.get("type") == "tool_result":
+                            pass
+                    elif isinstance(block, str):
+                        part = block
+                    if part:
+                        if parts.tell():
+                            parts.write("\n\n")
+                        parts.write(part)
+                content = parts.getvalue()
+            elif not isinstance(content, str):
+                content = str(content) if content else ""
+
+            if not content.strip():
                 continue
 
-    lines = []
-    lines.append(f"# Claude Code Chat Export")
-    lines.append(f"**Exported:** {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    lines.append(f"**Source:** `{input_path.name}`")
-    lines.append(f"**Messages:** {len(messages)}")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-
-    for msg in messages:
-        role = msg.get("type", msg.get("role", "unknown"))
-
-        # Skip non-conversation types
-        if role in ("queue-operation", "file-history-snapshot", "summary"):
-            continue
-
-        content = msg.get("message", msg.get("content", ""))
-
-        # Drill into nested message objects
-        if isinstance(content, dict):
-            content = content.get("content", "")
-
-        # Handle content that's a list (tool calls, etc.)
-        if isinstance(content, list):
-            parts = []
-            for block in content:
-                if isinstance(block, dict):
-                    if block.get("type") == "text":
-                        parts.append(block.get("text", ""))
-                    elif block.get("type") == "tool_use":
-                        tool = block.get("name", "unknown")
-                        inp = block.get("input", {})
-                        if tool == "Read":
-                            parts.append(f"*[Read: {inp.get('file_path', '?')}]*")
-                        elif tool == "Write":
-                            parts.append(f"*[Write: {inp.get('file_path', '?')}]*")
-                        elif tool == "Edit":
-                            parts.append(f"*[Edit: {inp.get('file_path', '?')}]*")
-                        elif tool == "Bash":
-                            cmd = inp.get("command", "?")
-                            if len(cmd) > 100:
-                                cmd = cmd[:100] + "..."
-                            parts.append(f"*[Bash: `{cmd}`]*")
-                        elif tool == "WebSearch":
-                            parts.append(f"*[Search: {inp.get('query', '?')}]*")
-                        elif tool == "WebFetch":
-                            parts.append(f"*[Fetch: {inp.get('url', '?')}]*")
-                        else:
-                            parts.append(f"*[Tool: {tool}]*")
-                    elif block.get("type") == "tool_result":
-                        pass
-                elif isinstance(block, str):
-                    parts.append(block)
-            content = "\n\n".join(p for p in parts if p)
-        elif not isinstance(content, str):
-            content = str(content) if content else ""
-
-        if not content.strip():
-            continue
-
-        if role == "user":
-            lines.append("## User")
-        elif role == "assistant":
-            lines.append("## Claude")
-        else:
-            lines.append(f"## {role.title()}")
-
-        lines.append("")
-        lines.append(content.strip())
-        lines.append("")
-        lines.append("---")
-        lines.append("")
-
-    output_path.write_text("\n".join(lines), encoding="utf-8")
+            if role == "user":
+                header = "## User"
+            elif role == "assistant":
+                header = "## Claude"
+            else:
+                header = f"## {role.title()}"
+
+            out.write(f"\n{header}\n\n")
+            out.write(content.strip())
+            out.write("\n\n---\n")
+
     print(f"Exported {len(messages)} messages to {output_path}")
 
 
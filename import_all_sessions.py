@@ -7,6 +7,8 @@ Usage:
     python import_all_sessions.py --convert-only   # just convert to markdown
     python import_all_sessions.py --import-only    # just import existing chunks
     python import_all_sessions.py --rebuild-fts    # rebuild the FTS index only
+    python import_all_sessions.py --verify-fts     # rebuild the FTS index only if out of sync
+    python import_all_sessions.py --fast           # skip fsync during import (see tune_connection)
 
 Handles:
     - Chunking large sessions into ~4000 char pieces
@@ -18,33 +20,28 @@ Handles:
     - Skips sessions with < 5 messages
 """
 
-import json
+import functools
+import io
+import itertools
 import sqlite3
 import re
 import sys
 import os
-import uuid
-from datetime import datetime, timezone
+import secrets
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from _memory_common import (
+    BATCH_SIZE, DB_PATH, INSERT_FTS_SQL, INSERT_MEMORY_SQL, RE_BOLD, RE_FIRST_SENT,
+    RE_HEADING, has_fts_trigger, iter_jsonl, json_dumps, tune_connection,
+)
+
 CLAUDE_PROJECTS = Path.home() / ".claude" / "projects"
 
 CHUNK_SIZE = 4000  # chars per chunk — fits well in the MCP's 1000 token budget
-
-
-def get_db_path() -> Path:
-    """Get the memory database path, matching @whenmoon-afk/memory-mcp conventions."""
-    if os.environ.get("MEMORY_DB_PATH"):
-        return Path(os.environ["MEMORY_DB_PATH"])
-    if sys.platform == "win32":
-        return Path(os.environ.get("APPDATA", "")) / "claude-memories" / "memory.db"
-    elif sys.platform == "darwin":
-        return Path.home() / ".claude-memories" / "memory.db"
-    else:
-        return Path.home() / ".local" / "share" / "claude-memories" / "memory.db"
-
-
-DB_PATH = get_db_path()
+MIN_MESSAGES = 5   # sessions with fewer messages aren't worth remembering
 
 
 SENSITIVE_PATTERNS = [
@@ -56,25 +53,93 @@ SENSITIVE_PATTERNS = [
 ]
 
 
+def _scoped(pattern) -> str:
+    """Turn a leading global (?i) into a scoped group so it can sit in an alternation."""
+    src = pattern.pattern
+    if src.startswith("(?i)"):
+        return f"(?i:{src[4:]})"
+    return src
+
+
+# All SENSITIVE_PATTERNS folded into one alternation, so text without secrets
+# (nearly every chunk) is cleared with a single scan.
+_SENSITIVE_RE = re.compile("|".join(
+    f"(?:{_scoped(pattern)})" for pattern, _ in SENSITIVE_PATTERNS
+))
+
+
+# Every sensitive pattern contains one of these literals (after case folding);
+# "ap\u0131" covers the dotless i that re's IGNORECASE also matches to "i".
+_SENSITIVE_HINTS = ("sk-", "ghp_", "api", "ap\u0131", "password")
+
+
 def scrub_sensitive(text: str) -> str:
     """Remove API keys, tokens, and other sensitive patterns from text."""
+    # Plain substring checks are far cheaper than a regex scan and rule out most text
+    folded = text.casefold()
+    if not any(hint in folded for hint in _SENSITIVE_HINTS):
+        return text
+    if not _SENSITIVE_RE.search(text):
+        return text
+    # The passes must still run in order: a single alternation substitution
+    # resolves overlaps differently (e.g. ghp_...sk-... runs) and can leak key tails.
     for pattern, replacement in SENSITIVE_PATTERNS:
         text = pattern.sub(replacement, text)
     return text
 
 
-def extract_text_from_message(msg: dict) -> str:
-    """Extract readable text from a JSONL message."""
+# Non-conversation JSONL record types
+_SKIP_ROLES = frozenset({"queue-operation", "file-history-snapshot", "summary", "unknown"})
+
+# One-line annotations for tool_use blocks; other tools render as "[Name]"
+_TOOL_FORMATTERS = {
+    "Read": lambda inp: f"[Read: {inp.get('file_path', '?')}]",
+    "Write": lambda inp: f"[Write: {inp.get('file_path', '?')}]",
+    "Edit": lambda inp: f"[Edit: {inp.get('file_path', '?')}]",
+    "Bash": lambda inp: f"[Bash: {inp.get('command', '?')[:80]}]",
+    "WebSearch": lambda inp: f"[WebSearch: {inp.get('query', inp.get('url', '?'))[:60]}]",
+    "WebFetch": lambda inp: f"[WebFetch: {inp.get('query', inp.get('url', '?'))[:60]}]",
+}
+
+# Precompiled patterns for the per-chunk summary / naming helpers
+_RE_TOOL = re.compile(r'\[(?:Read|Write|Edit|Bash|WebSearch|WebFetch|Tool)[^\]]*\]')
+# Openers that mark a new request; plain prefixes, so "whatever" still counts like "what"
+_RE_TOPIC_SHIFT = re.compile(
+    r"(?:can you|how do|what|where|why|help me|i need|i want|please|let's"
+    r"|now |next |okay so|hey |alright)",
+    re.IGNORECASE,
+)
+_RE_PROJECT_DEV = re.compile(r'^[a-zA-Z]--Users-[^-]+-Development-')
+_RE_PROJECT_HOME = re.compile(r'^[a-zA-Z]--Users-[^-]+-')
+_RE_PROJECT_WORKTREE = re.compile(r'^[a-zA-Z]--Users-[^-]+--claude-worktrees-')
+
+
+def message_role(msg: dict) -> str:
+    """Get the role of a JSONL message."""
     # JSONL uses "type" for role at top level; nested "message" dict has "role" too
-    role = msg.get("type", msg.get("role", "unknown"))
+    role = msg.get("type")
+    if role is None:  # only fall back to a second lookup when "type" is missing
+        role = msg.get("role", "unknown")
+    return role
+
+
+def extract_text_from_message(msg: dict, role: str | None = None) -> str:
+    """Extract readable text from a JSONL message.
+
+    Pass ``role`` when the caller already looked it up with message_role().
+    """
+    if role is None:
+        role = message_role(msg)
 
     # Skip non-conversation message types
-    if role in ("queue-operation", "file-history-snapshot", "summary", "unknown"):
+    if role in _SKIP_ROLES:
         return ""
 
     # The JSONL format has nested structures — "message" can be a dict with
     # model metadata (not text).  Prefer "content" from the nested message object.
-    raw = msg.get("message", msg.get("content", ""))
+    raw = msg.get("message")
+    if raw is None:
+        raw = msg.get("content", "")
 
     # If "message" is a nested object (e.g. {"model": ..., "content": [...]}),
     # drill into its "content" field instead of stringifying the whole dict.
@@ -89,20 +154,8 @@ def extract_text_from_message(msg: dict) -> str:
                     parts.append(block.get("text", ""))
                 elif block.get("type") == "tool_use":
                     tool = block.get("name", "unknown")
-                    inp = block.get("input", {})
-                    if tool == "Read":
-                        parts.append(f"[Read: {inp.get('file_path', '?')}]")
-                    elif tool == "Write":
-                        parts.append(f"[Write: {inp.get('file_path', '?')}]")
-                    elif tool == "Edit":
-                        parts.append(f"[Edit: {inp.get('file_path', '?')}]")
-                    elif tool == "Bash":
-                        cmd = inp.get("command", "?")[:80]
-                        parts.append(f"[Bash: {cmd}]")
-                    elif tool in ("WebSearch", "WebFetch"):
-                        parts.append(f"[{tool}: {inp.get('query', inp.get('url', '?'))[:60]}]")
-                    else:
-                        parts.append(f"[{tool}]")
+                    fmt = _TOOL_FORMATTERS.get(tool)
+                    parts.append(fmt(block.get("input", {})) if fmt else f"[{tool}]")
                 # Skip tool_result blocks — they contain raw output / noise
                 elif block.get("type") == "tool_result":
                     pass
@@ -122,31 +175,33 @@ def extract_text_from_message(msg: dict) -> str:
     return f"**{prefix}:** {text}"
 
 
-def extract_first_user_message(messages: list[dict]) -> str:
-    """Get the first substantive user message as session topic."""
-    for msg in messages:
-        if msg.get("role") == "user" or msg.get("type") == "user":
-            content = msg.get("message", msg.get("content", ""))
-            if isinstance(content, dict):
-                content = content.get("content", "")
-            if isinstance(content, list):
-                for block in content:
-                    if isinstance(block, dict) and block.get("type") == "text":
-                        text = block.get("text", "").strip()
-                        if len(text) > 10:
-                            return text[:150]
-            elif isinstance(content, str) and len(content.strip()) > 10:
-                return content.strip()[:150]
+def extract_user_topic(msg: dict) -> str:
+    """Get a message's text as a session topic, if it's a substantive user message."""
+    if msg.get("role") == "user" or msg.get("type") == "user":
+        content = msg.get("message")
+        if content is None:
+            content = msg.get("content", "")
+        if isinstance(content, dict):
+            content = content.get("content", "")
+        if isinstance(content, list):
+            for block in content:
+                if isinstance(block, dict) and block.get("type") == "text":
+                    text = block.get("text", "").strip()
+                    if len(text) > 10:
+                        return text[:150]
+        elif isinstance(content, str) and len(content.strip()) > 10:
+            return content.strip()[:150]
     return ""
 
 
+@functools.lru_cache(maxsize=None)  # every session in a folder maps to the same name
 def derive_project_name(folder_name: str) -> str:
     """Convert folder name like c--Users-username-Development-foo to readable name."""
     name = folder_name
     # Strip drive letter and common path prefixes (platform-agnostic)
-    name = re.sub(r'^[a-zA-Z]--Users-[^-]+-Development-', '', name)
-    name = re.sub(r'^[a-zA-Z]--Users-[^-]+-', '', name)
-    name = re.sub(r'^[a-zA-Z]--Users-[^-]+--claude-worktrees-', '', name)
+    name = _RE_PROJECT_DEV.sub('', name)
+    name = _RE_PROJECT_HOME.sub('', name)
+    name = _RE_PROJECT_WORKTREE.sub('', name)
     return name.replace("-", " ").replace("_", " ").strip() or "General"
 
 
@@ -158,14 +213,14 @@ def generate_summary(text: str) -> str:
         if len(parts) >= 3:
             text = parts[2].strip()
     # Strip markdown formatting
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = RE_HEADING.sub('', text)
+    text = RE_BOLD.sub(r'\1', text)
     # Strip tool call annotations
-    text = re.sub(r'\[(?:Read|Write|Edit|Bash|WebSearch|WebFetch|Tool)[^\]]*\]', '', text)
+    text = _RE_TOOL.sub('', text)
     text = text.strip()
 
     # Try first sentence
-    match = re.match(r'^[^.!?\n]+[.!?]', text)
+    match = RE_FIRST_SENT.match(text)
     if match:
         s = match.group(0).strip()
         words = s.split()
@@ -189,7 +244,7 @@ def generate_chunk_summary(chunk_parts: list[str], project_name: str, chunk_num:
             # Skip very short responses (confirmations, "yes", "ok", etc.)
             if len(msg) > 20:
                 # Clean up tool annotations
-                msg = re.sub(r'\[(?:Read|Write|Edit|Bash|WebSearch|WebFetch|Tool)[^\]]*\]', '', msg).strip()
+                msg = _RE_TOOL.sub('', msg).strip()
                 if msg:
                     user_topics.append(msg)
 
@@ -218,10 +273,7 @@ def is_topic_shift(part: str, prev_part: str) -> bool:
     if len(msg) < 30:
         return False
     # Questions and requests are likely new topics
-    if any(msg.lower().startswith(w) for w in
-           ["can you", "how do", "what", "where", "why", "help me", "i need",
-            "i want", "please", "let's", "now ", "next ", "okay so",
-            "hey ", "alright"]):
+    if _RE_TOPIC_SHIFT.match(msg):
         return True
     # If it's long enough and follows a Claude message, likely a new topic
     if prev_part.startswith("**Claude:**") and len(msg) > 80:
@@ -229,39 +281,39 @@ def is_topic_shift(part: str, prev_part: str) -> bool:
     return False
 
 
-def chunk_session(messages: list[dict], project: str, session_id: str) -> list[tuple[str, str]]:
-    """Split session into topic-aware chunks. Returns list of (content, summary) tuples."""
-    # Extract all text
-    text_parts = []
-    for msg in messages:
-        text = extract_text_from_message(msg)
-        if text:
-            text_parts.append(text)
-
-    if not text_parts:
-        return []
+def chunk_session(messages: Iterable[dict], project: str,
+                  session_id: str) -> Iterator[tuple[str, str]]:
+    """Split session into topic-aware chunks, yielding (content, summary) tuples.
 
+    ``messages`` is consumed once, so it can be a lazy iterator over the JSONL file.
+    Chunks are yielded as soon as the session is known to be too big for a single
+    chunk, so at most about CHUNK_SIZE of text is held at a time.
+    """
     project_name = derive_project_name(project)
-    full_text = "\n\n".join(text_parts)
 
-    # If small enough, single chunk
-    if len(full_text) <= CHUNK_SIZE:
-        topic = extract_first_user_message(messages)
-        summary = f"Session in {project_name}: {generate_summary(topic or full_text)}"
-        return [(full_text, summary[:200])]
+    # Single pass: each message's text goes straight into the chunk being built
+    held = []            # finished chunks not yet yielded (session may still fit in one)
+    chunk_num = 0        # number of finished chunks
+    buf = io.StringIO()  # text of the current chunk
+    chunk_parts = []     # parts of the current chunk, for its summary
+    current_size = 0     # sum of part lengths in the current chunk
+    total_size = 0       # length of the whole session joined with blank lines
+    prev_part = ""
+    topic = ""           # first substantive user message
 
-    # Topic-aware chunking: split at topic shifts or size limits
-    chunks = []
-    current_chunk = []
-    current_size = 0
-    chunk_num = 0
-
-    for i, part in enumerate(text_parts):
-        prev_part = text_parts[i - 1] if i > 0 else ""
+    for msg in messages:
+        if not topic:
+            topic = extract_user_topic(msg)
+        role = message_role(msg)
+        if role in _SKIP_ROLES:
+            continue
+        part = extract_text_from_message(msg, role)
+        if not part:
+            continue
 
         # Split if: topic shift AND chunk is big enough, OR size limit exceeded
         should_split = False
-        if current_chunk:
+        if chunk_parts:
             if current_size + len(part) > CHUNK_SIZE:
                 should_split = True
             elif current_size > CHUNK_SIZE // 3 and is_topic_shift(part, prev_part):
@@ -270,83 +322,209 @@ def chunk_session(messages: list[dict], project: str, session_id: str) -> list[t
 
         if should_split:
             chunk_num += 1
-            chunk_text = "\n\n".join(current_chunk)
-            chunk_summary = generate_chunk_summary(current_chunk, project_name, chunk_num)
-            chunks.append((chunk_text, chunk_summary))
-            current_chunk = [part]
-            current_size = len(part)
-        else:
-            current_chunk.append(part)
-            current_size += len(part)
+            chunk_summary = generate_chunk_summary(chunk_parts, project_name, chunk_num)
+            held.append((buf.getvalue(), chunk_summary))
+            # Reuse the buffer rather than allocating a new one per chunk
+            buf.seek(0)
+            buf.truncate(0)
+            chunk_parts = []
+            current_size = 0
+
+        if chunk_parts:
+            buf.write("\n\n")
+        buf.write(part)
+        chunk_parts.append(part)
+        current_size += len(part)
+        total_size += len(part) + (2 if prev_part else 0)
+        prev_part = part
+
+        # Past CHUNK_SIZE the session can't collapse into one chunk, so stop holding
+        if held and total_size > CHUNK_SIZE:
+            yield from held
+            held.clear()
 
     # Last chunk
-    if current_chunk:
+    if chunk_parts:
         chunk_num += 1
-        chunk_text = "\n\n".join(current_chunk)
-        chunk_summary = generate_chunk_summary(current_chunk, project_name, chunk_num)
-        chunks.append((chunk_text, chunk_summary))
+        chunk_summary = generate_chunk_summary(chunk_parts, project_name, chunk_num)
+        held.append((buf.getvalue(), chunk_summary))
 
-    return chunks
+    if not held:
+        return
 
+    # If small enough, single chunk
+    if total_size <= CHUNK_SIZE:
+        full_text = "\n\n".join(chunk_text for chunk_text, _ in held)
+        summary = f"Session in {project_name}: {generate_summary(topic or full_text)}"
+        yield full_text, summary[:200]
+        return
 
-def get_existing_sources(conn: sqlite3.Connection) -> set[str]:
-    """Get filenames already imported to avoid duplicates."""
-    rows = conn.execute(
-        "SELECT metadata FROM memories WHERE metadata LIKE '%claude-session%' AND is_deleted = 0"
-    ).fetchall()
-    sources = set()
-    for row in rows:
-        try:
-            meta = json.loads(row[0])
-            if "filename" in meta:
-                sources.add(meta["filename"])
-        except (json.JSONDecodeError, TypeError):
-            pass
-    return sources
+    yield from held
+
+
+def process_file(jsonl_path: Path) -> tuple[int, list[tuple[str, str]]]:
+    """Parse and chunk one session file. Returns (message count, chunks).
+
+    Messages are streamed from the file into chunk_session, so only the chunks
+    are held in memory, not every parsed message. Runs in a worker process, so
+    it must not touch the database.
+    """
+    messages = iter_jsonl(jsonl_path)
+    # Read just enough to rule out tiny sessions before any extraction or chunking
+    head = list(itertools.islice(messages, MIN_MESSAGES))
+    if len(head) < MIN_MESSAGES:
+        return len(head), []
+
+    message_count = 0
+
+    def counted(messages):
+        nonlocal message_count
+        for msg in messages:
+            message_count += 1
+            yield msg
+
+    # The chunks go back to the parent process as one result, so collect them here
+    chunks = list(chunk_session(counted(itertools.chain(head, messages)),
+                                jsonl_path.parent.name, jsonl_path.stem[:8]))
+    return message_count, chunks
+
+
+# Metadata fields as SQL expressions. json_valid() guards json_extract, which
+# raises on malformed JSON: inside an index that would make every insert of such
+# a row fail (the MCP server's included), and old rows could break CREATE INDEX.
+_SQL_META_SOURCE = "CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.source') END"
+_SQL_META_FILENAME = "CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.filename') END"
 
 
-def import_chunk(conn: sqlite3.Connection, content: str, summary: str,
-                 source_file: str, chunk_idx: int) -> bool:
-    """Import a single chunk into the memory DB with proper MCP-compatible format."""
-    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-    memory_id = f"mem_{uuid.uuid4().hex[:24]}"
+def ensure_source_index(conn: sqlite3.Connection):
+    """Index session source names so the dedup lookup doesn't scan every memory row.
 
+    The index is only an optimization: if it can't be created, the lookup
+    falls back to a table scan.
+    """
     try:
         conn.execute(
-            "INSERT INTO memories (id, content, type, importance, created_at, "
-            "last_accessed, is_deleted, summary, access_count, metadata) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (memory_id, content, "fact", 0.5, now_ms, now_ms, 0, summary, 0,
-             json.dumps({"source": "claude-session", "filename": source_file,
-                         "chunk": chunk_idx}))
+            "CREATE INDEX IF NOT EXISTS idx_memories_source_meta ON memories("
+            f"{_SQL_META_SOURCE}, {_SQL_META_FILENAME}) WHERE is_deleted = 0"
         )
-        # Also insert into FTS
-        conn.execute(
-            "INSERT INTO memories_fts (memory_id, content, summary) VALUES (?, ?, ?)",
-            (memory_id, content, summary)
-        )
-        return True
     except sqlite3.Error as e:
-        print(f"  DB error: {e}")
-        return False
+        print(f"  Could not index session sources ({e}); dedup will scan all memories")
+
+
+def get_existing_sources(conn: sqlite3.Connection) -> set[str]:
+    """Get the source names (``{project}_{session}``) already imported, to skip duplicates.
+
+    Names are normalized so main can check candidates with plain set membership.
+    """
+    # Served by idx_memories_source_meta (same guarded expressions, so rows with
+    # malformed metadata are skipped); no metadata decoding in Python, and rows
+    # stream off the cursor instead of being materialized first
+    rows = conn.execute(
+        f"SELECT {_SQL_META_FILENAME} FROM memories "
+        f"WHERE {_SQL_META_SOURCE} = 'claude-session' AND is_deleted = 0"
+    )
+    return {normalize_source_name(filename) for (filename,) in rows if filename}
+
+
+def normalize_source_name(filename: str) -> str:
+    """Reduce a stored session filename to the ``{project}_{session}`` form used at import."""
+    # Tolerate names stored with a file extension; project folder names and
+    # session IDs never contain dots, so this can't clip a real source name
+    for suffix in (".jsonl", ".md"):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def write_batch(conn: sqlite3.Connection, memory_rows: list[tuple],
+                fts_rows: list[tuple]) -> int:
+    """Insert and commit a batch of chunk rows as one transaction.
+
+    ``fts_rows`` may be empty when a trigger keeps memories_fts in sync.
+    """
+    # Bounded transactions keep the dirty pages within cache_size instead of
+    # spilling one import-sized transaction to disk
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(INSERT_MEMORY_SQL, memory_rows)
+    if fts_rows:
+        conn.executemany(INSERT_FTS_SQL, fts_rows)
+    conn.execute("COMMIT")
+    return len(memory_rows)
+
+
+def session_metadata_prefix(source_file: str) -> str:
+    """Return a session's chunk metadata JSON up to the chunk index.
+
+    The schema is fixed, so only the filename goes through the JSON encoder
+    (once per session); build_chunk_rows appends the index and closing brace.
+    """
+    return '{"source":"claude-session","filename":' + json_dumps(source_file) + ',"chunk":'
+
+
+def build_chunk_rows(content: str, summary: str, metadata_prefix: str,
+                     chunk_idx: int, now_ms: int) -> tuple[tuple, tuple]:
+    """Build the MCP-compatible (memories row, memories_fts row) for a single chunk.
+
+    ``metadata_prefix`` comes from session_metadata_prefix(); ``now_ms`` is the
+    epoch-millisecond import time, taken once per run.
+    """
+    memory_id = f"mem_{secrets.token_hex(12)}"  # 24 hex chars
+
+    memory_row = (memory_id, content, "fact", 0.5, now_ms, now_ms, 0, summary, 0,
+                  f"{metadata_prefix}{chunk_idx}}}")
+    fts_row = (memory_id, content, summary)
+    return memory_row, fts_row
 
 
 def rebuild_fts(conn: sqlite3.Connection):
-    """Rebuild the entire FTS index from scratch."""
-    conn.execute("DELETE FROM memories_fts")
+    """Rebuild the entire FTS index from scratch, in a single transaction.
+
+    ``conn`` must be in autocommit mode (``isolation_level=None``).
+    """
+    # memories_fts is a regular (not external-content) FTS5 table, so FTS5's
+    # 'rebuild' command would only re-index its own rows. Recreating it from its
+    # stored DDL is much faster than DELETE, which tokenizes every row to remove it.
+    # The MCP's sync triggers live on memories and survive the drop.
+    # One explicit transaction: a single journal commit, and a failure part-way
+    # can't leave the index dropped or half-filled.
+    conn.execute("BEGIN IMMEDIATE")
+    ddl = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+    ).fetchone()[0]
+    conn.execute("DROP TABLE memories_fts")
+    conn.execute(ddl)
     conn.execute(
         "INSERT INTO memories_fts (memory_id, content, summary) "
         "SELECT id, content, summary FROM memories WHERE is_deleted = 0"
     )
+    # Merge the segments the bulk insert left behind into one b-tree for faster queries
+    conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('optimize')")
     count = conn.execute("SELECT COUNT(*) FROM memories_fts").fetchone()[0]
+    conn.execute("COMMIT")
     print(f"FTS index rebuilt: {count} entries")
 
 
+def fts_in_sync(conn: sqlite3.Connection) -> bool:
+    """Check that memories_fts holds exactly one row per active memory."""
+    fts_count = conn.execute("SELECT COUNT(*) FROM memories_fts").fetchone()[0]
+    active_count = conn.execute(
+        "SELECT COUNT(*) FROM memories WHERE is_deleted = 0"
+    ).fetchone()[0]
+    return fts_count == active_count
+
+
 def main():
-    if "--rebuild-fts" in sys.argv:
-        conn = sqlite3.connect(str(DB_PATH))
-        rebuild_fts(conn)
-        conn.commit()
+    if "--rebuild-fts" in sys.argv or "--verify-fts" in sys.argv:
+        conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+        try:
+            if "--rebuild-fts" in sys.argv or not fts_in_sync(conn):
+                rebuild_fts(conn)
+            else:
+                print("FTS index is in sync, nothing to rebuild")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"FTS rebuild failed: {e}")
         conn.close()
         return
 
@@ -354,14 +532,19 @@ def main():
     do_import = "--convert-only" not in sys.argv
 
     # Find all JSONL files, skip agent-* files
+    # os.scandir answers is_dir()/is_file() from the directory listing itself,
+    # so this costs no per-entry stat calls on most filesystems
     jsonl_files = []
-    for project_dir in sorted(CLAUDE_PROJECTS.iterdir()):
-        if not project_dir.is_dir():
-            continue
-        for f in sorted(project_dir.glob("*.jsonl")):
-            if f.stem.startswith("agent-"):
+    with os.scandir(CLAUDE_PROJECTS) as projects:
+        for project_dir in projects:
+            if not project_dir.is_dir():
                 continue
-            jsonl_files.append(f)
+            with os.scandir(project_dir.path) as entries:
+                for f in entries:
+                    if (f.name.endswith(".jsonl") and not f.name.startswith("agent-")
+                            and f.is_file()):
+                        jsonl_files.append(Path(f.path))
+    jsonl_files.sort()
 
     print(f"Found {len(jsonl_files)} session files (excluding agent logs)")
 
@@ -373,63 +556,94 @@ def main():
         if not DB_PATH.exists():
             print(f"Database not found at {DB_PATH}. Run the MCP server once first.")
             sys.exit(1)
-        conn = sqlite3.connect(str(DB_PATH))
+        # Autocommit mode: transactions are opened explicitly, never implicitly
+        conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+        tune_connection(conn, fast="--fast" in sys.argv)
+        ensure_source_index(conn)
         existing_sources = get_existing_sources(conn)
+        # With the MCP's insert trigger in place, inserting FTS rows ourselves
+        # would index every chunk twice
+        insert_fts = not has_fts_trigger(conn)
     else:
         conn = None
         existing_sources = set()
+        insert_fts = False
 
     total_imported = 0
-    total_chunks = 0
     skipped = 0
+    memory_rows, fts_rows = [], []
+    complete = 0  # leading rows of memory_rows that form whole sessions
+    # One import timestamp for the whole run (epoch ms, matching the MCP schema)
+    now_ms = time.time_ns() // 1_000_000
 
+    pending = []
     for jsonl_path in jsonl_files:
-        project = jsonl_path.parent.name
-        source_name = f"{project}_{jsonl_path.stem}"
+        source_name = f"{jsonl_path.parent.name}_{jsonl_path.stem}"
 
-        # Skip if already imported
-        if any(source_name in s for s in existing_sources):
+        # Skip if already imported (metadata stores this exact source_name)
+        if source_name in existing_sources:
             skipped += 1
             continue
+        pending.append(jsonl_path)
 
-        # Read and parse
-        messages = []
-        with open(jsonl_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    messages.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
-
-        if len(messages) < 5:
-            skipped += 1
-            continue
-
-        # Chunk the session
-        chunks = chunk_session(messages, project, jsonl_path.stem[:8])
-        if not chunks:
-            skipped += 1
-            continue
-
-        project_name = derive_project_name(project)
-        print(f"\n  {project_name} ({len(messages)} msgs -> {len(chunks)} chunks)")
-
-        if do_import and conn:
-            for i, (content, summary) in enumerate(chunks):
-                if import_chunk(conn, content, summary, source_name, i):
-                    total_imported += 1
-                    total_chunks += 1
+    # Parsing and chunking are CPU-bound and independent per file, so they run
+    # in worker processes; only this process talks to SQLite.
+    try:
+        with ProcessPoolExecutor() as executor:
+            try:
+                results = executor.map(process_file, pending, chunksize=4)
+                for jsonl_path, (message_count, chunks) in zip(pending, results):
+                    if not chunks:
+                        skipped += 1
+                        continue
+
+                    project = jsonl_path.parent.name
+                    source_name = f"{project}_{jsonl_path.stem}"
+                    project_name = derive_project_name(project)
+                    print(f"\n  {project_name} ({message_count} msgs -> {len(chunks)} chunks)")
+
+                    if do_import and conn:
+                        metadata_prefix = session_metadata_prefix(source_name)
+                        for i, (content, summary) in enumerate(chunks):
+                            memory_row, fts_row = build_chunk_rows(content, summary, metadata_prefix,
+                                                                   i, now_ms)
+                            memory_rows.append(memory_row)
+                            if insert_fts:
+                                fts_rows.append(fts_row)
+                        complete = len(memory_rows)
+                        # Commit about every BATCH_SIZE rows as results stream in. Batches
+                        # end on session boundaries, so an interrupted import leaves
+                        # only whole sessions behind and a rerun picks up the rest.
+                        if len(memory_rows) >= BATCH_SIZE:
+                            total_imported += write_batch(conn, memory_rows, fts_rows)
+                            memory_rows.clear()
+                            fts_rows.clear()
+                            complete = 0
+            except BaseException as e:
+                # Whatever the failure (DB error, worker exception, Ctrl-C), cancel the
+                # queued files so the executor's shutdown doesn't parse every
+                # remaining session before the error surfaces
+                executor.shutdown(wait=False, cancel_futures=True)
+                # Keep the sessions collected so far, unless the database is what failed
+                if conn and complete and not isinstance(e, sqlite3.Error):
+                    try:
+                        total_imported += write_batch(conn, memory_rows[:complete],
+                                                      fts_rows[:complete])
+                        print(f"\nImported {total_imported} chunks before the error")
+                    except sqlite3.Error:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                raise
+
+        if conn and memory_rows:
+            total_imported += write_batch(conn, memory_rows, fts_rows)
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"  DB error: {e}")
 
     if conn:
-        conn.commit()
         print(f"\nImported: {total_imported} chunks from sessions, Skipped: {skipped}")
-
-        # Rebuild FTS to be safe
-        rebuild_fts(conn)
-        conn.commit()
         conn.close()
 
     print("Done.")
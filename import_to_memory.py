@@ -3,34 +3,23 @@ Import markdown files into the Claude Memory MCP SQLite database.
 
 Usage:
     python import_to_memory.py <folder_path>
+    python import_to_memory.py <folder_path> --fast   # skip fsync during import
 
 Each .md file becomes a memory entry. The filename becomes the title,
 and the file content becomes the memory content.
 """
 
 import json
-import re
 import sqlite3
 import sys
-import os
-import uuid
-from datetime import datetime, timezone
+import time
+import secrets
 from pathlib import Path
 
-
-def get_db_path() -> Path:
-    """Get the memory database path, matching @whenmoon-afk/memory-mcp conventions."""
-    if os.environ.get("MEMORY_DB_PATH"):
-        return Path(os.environ["MEMORY_DB_PATH"])
-    if sys.platform == "win32":
-        return Path(os.environ.get("APPDATA", "")) / "claude-memories" / "memory.db"
-    elif sys.platform == "darwin":
-        return Path.home() / ".claude-memories" / "memory.db"
-    else:
-        return Path.home() / ".local" / "share" / "claude-memories" / "memory.db"
-
-
-DB_PATH = get_db_path()
+from _memory_common import (
+    BATCH_SIZE, DB_PATH, INSERT_FTS_SQL, INSERT_MEMORY_SQL, RE_BOLD, RE_FIRST_SENT,
+    RE_HEADING, RE_HEADING_TEXT, has_fts_trigger, tune_connection,
+)
 
 
 def get_db(db_path: Path) -> sqlite3.Connection:
@@ -38,7 +27,8 @@ def get_db(db_path: Path) -> sqlite3.Connection:
         print(f"Database not found at {db_path}")
         print("Run the memory MCP server at least once first to initialize the DB.")
         sys.exit(1)
-    return sqlite3.connect(str(db_path))
+    # Autocommit mode: the import opens its transaction explicitly
+    return sqlite3.connect(str(db_path), isolation_level=None)
 
 
 def generate_summary(content: str) -> str:
@@ -50,15 +40,15 @@ def generate_summary(content: str) -> str:
         if len(parts) >= 3:
             text = parts[2].strip()
     # Strip markdown formatting
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = RE_HEADING.sub('', text)
+    text = RE_BOLD.sub(r'\1', text)
     text = text.strip()
 
     # Collect headings as topic indicators
-    headings = re.findall(r'^#+\s+(.+)$', content, flags=re.MULTILINE)
+    headings = RE_HEADING_TEXT.findall(content)
 
     # Try first sentence
-    match = re.match(r'^[^.!?\n]+[.!?]', text)
+    match = RE_FIRST_SENT.match(text)
     if match:
         s = match.group(0).strip()
         words = s.split()
@@ -80,41 +70,33 @@ def generate_summary(content: str) -> str:
     return text[:100]
 
 
-def import_file(conn: sqlite3.Connection, filepath: Path) -> bool:
-    """Import a single markdown file as a memory entry."""
+def build_file_rows(filepath: Path, now_ms: int) -> tuple[tuple, tuple] | None:
+    """Build the (memories row, memories_fts row) for a markdown file, or None if it's empty.
+
+    ``now_ms`` is the epoch-millisecond import time, taken once per run.
+    """
     content = filepath.read_text(encoding="utf-8", errors="replace").strip()
     if not content:
-        return False
+        return None
 
     summary = generate_summary(content)
-    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-    memory_id = f"mem_{uuid.uuid4().hex[:24]}"
+    memory_id = f"mem_{secrets.token_hex(12)}"  # 24 hex chars
 
-    try:
-        conn.execute(
-            "INSERT INTO memories (id, content, type, importance, created_at, "
-            "last_accessed, is_deleted, summary, access_count, metadata) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (memory_id, content, "fact", 0.7, now_ms, now_ms, 0, summary, 0,
-             json.dumps({"source": "markdown-import", "filename": filepath.name}))
-        )
-        # Also populate FTS index
-        conn.execute(
-            "INSERT INTO memories_fts (memory_id, content, summary) VALUES (?, ?, ?)",
-            (memory_id, content, summary)
-        )
-        return True
-    except sqlite3.Error as e:
-        print(f"  Error importing {filepath.name}: {e}")
-        return False
+    memory_row = (memory_id, content, "fact", 0.7, now_ms, now_ms, 0, summary, 0,
+                  # Fixed schema: only the filename needs JSON escaping
+                  '{"source": "markdown-import", "filename": ' + json.dumps(filepath.name) + '}')
+    fts_row = (memory_id, content, summary)
+    return memory_row, fts_row
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python import_to_memory.py <folder_path>")
+    fast = "--fast" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--fast"]
+    if not args:
+        print("Usage: python import_to_memory.py <folder_path> [--fast]")
         sys.exit(1)
 
-    folder = Path(sys.argv[1])
+    folder = Path(args[0])
     if not folder.is_dir():
         print(f"Not a directory: {folder}")
         sys.exit(1)
@@ -126,20 +108,41 @@ def main():
 
     print(f"Database: {DB_PATH}")
     conn = get_db(DB_PATH)
+    tune_connection(conn, fast)
+    # The MCP schema indexes new memories itself; inserting them again would
+    # double every FTS row, so only write memories_fts on older databases.
+    insert_fts = not has_fts_trigger(conn)
 
     print(f"Found {len(md_files)} markdown files to import.")
-    imported = 0
+    memory_rows, fts_rows = [], []
     skipped = 0
+    # One import timestamp for the whole run (epoch ms, matching the MCP schema)
+    now_ms = time.time_ns() // 1_000_000
 
     for f in md_files:
-        if import_file(conn, f):
-            imported += 1
+        rows = build_file_rows(f, now_ms)
+        if rows:
+            memory_rows.append(rows[0])
+            fts_rows.append(rows[1])
             print(f"  + {f.name}")
         else:
             skipped += 1
             print(f"  - {f.name} (empty, skipped)")
 
-    conn.commit()
+    # Batched inserts inside one explicit transaction
+    imported = 0
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for start in range(0, len(memory_rows), BATCH_SIZE):
+            conn.executemany(INSERT_MEMORY_SQL, memory_rows[start:start + BATCH_SIZE])
+            if insert_fts:
+                conn.executemany(INSERT_FTS_SQL, fts_rows[start:start + BATCH_SIZE])
+        conn.execute("COMMIT")
+        imported = len(memory_rows)
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"  Error importing: {e}")
     conn.close()
 
     print(f"\nDone: {imported} imported, {skipped} skipped.")
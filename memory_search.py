@@ -15,23 +15,8 @@ Examples:
 
 import sqlite3
 import sys
-import os
-from pathlib import Path
-
-
-def get_db_path() -> Path:
-    """Get the memory database path, matching @whenmoon-afk/memory-mcp conventions."""
-    if os.environ.get("MEMORY_DB_PATH"):
-        return Path(os.environ["MEMORY_DB_PATH"])
-    if sys.platform == "win32":
-        return Path(os.environ.get("APPDATA", "")) / "claude-memories" / "memory.db"
-    elif sys.platform == "darwin":
-        return Path.home() / ".claude-memories" / "memory.db"
-    else:
-        return Path.home() / ".local" / "share" / "claude-memories" / "memory.db"
-
 
-DB_PATH = get_db_path()
+from _memory_common import DB_PATH
 
 
 def get_db() -> sqlite3.Connection:
@@ -43,14 +28,25 @@ def get_db() -> sqlite3.Connection:
     return conn
 
 
+def build_fts_query(query: str) -> str:
+    """Turn a CLI query into an FTS5 phrase query whose last word may be a prefix.
+
+    This is the closest index-backed match to the old ``content LIKE '%query%'``:
+    'plant ca' still finds "plant care".
+    """
+    return '"' + query.replace('"', '""') + '"*'
+
+
 def search(query: str):
     conn = get_db()
     try:
+        # FTS5 index lookup instead of a LIKE scan over every row's content
         rows = conn.execute(
             "SELECT id, summary, substr(content, 1, 300) as preview, created_at "
-            "FROM memories WHERE is_deleted = 0 AND content LIKE ? "
+            "FROM memories WHERE is_deleted = 0 AND id IN "
+            "(SELECT memory_id FROM memories_fts WHERE memories_fts MATCH ?) "
             "ORDER BY created_at DESC",
-            (f"%{query}%",)
+            (build_fts_query(query),)
         ).fetchall()
     except Exception:
         rows = []
@@ -90,10 +86,11 @@ def list_all():
 
 def stats():
     conn = get_db()
+    conn.row_factory = None  # scalar counts only; plain tuples skip the Row wrapping
     total = conn.execute("SELECT COUNT(*) FROM memories WHERE is_deleted = 0").fetchone()[0]
     deleted = conn.execute("SELECT COUNT(*) FROM memories WHERE is_deleted = 1").fetchone()[0]
     types = conn.execute(
-        "SELECT type, COUNT(*) as c FROM memories WHERE is_deleted = 0 GROUP BY type"
+        "SELECT type, COUNT(*) FROM memories WHERE is_deleted = 0 GROUP BY type"
     ).fetchall()
     size = DB_PATH.stat().st_size
 
@@ -102,8 +99,8 @@ def stats():
     print(f"Active memories: {total}")
     print(f"Deleted memories: {deleted}")
     print(f"Types:")
-    for t in types:
-        print(f"  {t['type']}: {t['c']}")
+    for memory_type, count in types:
+        print(f"  {memory_type}: {count}")
     conn.close()
 
 